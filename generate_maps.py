@@ -1,7 +1,7 @@
 """
 麦生育マップ - GitHub Actions自動更新版 (キャッシュ機構搭載)
 NDVI、NDWI、GNDVI の3つのマップを作成
-各日付のデータをGeoJSONキャッシュとして保存し、新規日付のみ処理
+各日付のデータをParquetキャッシュとして保存し、新規日付のみ処理
 """
 
 import ee
@@ -11,8 +11,11 @@ from folium import FeatureGroup
 import numpy as np
 import os
 import datetime as dt
-import json
+import orjson
 import argparse
+import gzip
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # ===== 引数パース =====
 parser = argparse.ArgumentParser()
@@ -40,12 +43,15 @@ FIELD_ASSET = 'projects/ee-kitsukisaiseikyo/assets/2025442101'
 TARGET_FIELDS_PATH = '新庄麦筆リスト.xlsx'
 OUTPUT_DIR = 'output'
 CACHE_DIR = os.path.join(OUTPUT_DIR, 'cache')
+FIELDS_FILE = os.path.join(CACHE_DIR, 'fields.geojson')
 STATE_FILE = 'last_processed.txt'
 
 START_DATE = '2025-12-01'
 END_DATE = dt.datetime.now().strftime('%Y-%m-%d')
 PIXEL_SCALE = 10
 CLOUD_THRESHOLD = 50
+DATES_PER_REQUEST = 8  # computePixels 1回あたりの日付数
+MAX_WORKERS = 8        # GEEへの同時リクエスト数
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(CACHE_DIR, exist_ok=True)
@@ -59,6 +65,7 @@ if args.force_rebuild:
 # ===== データ読み込み =====
 print("\n[1] データ読み込み中...")
 target_fields_df = pd.read_excel(TARGET_FIELDS_PATH)
+uu_to_addr = dict(zip(target_fields_df['polygon_uu'].astype(str), target_fields_df['address'].astype(str)))
 print(f"  ✓ 対象筆数: {len(target_fields_df)}筆")
 
 field_polygons = ee.FeatureCollection(FIELD_ASSET)
@@ -73,24 +80,25 @@ def mask_s2_clouds(image):
     mask = qa.bitwiseAnd(1 << 10).eq(0).And(qa.bitwiseAnd(1 << 11).eq(0))
     return image.updateMask(mask).divide(10000)
 
-def add_indices(image):
-    ndvi = image.normalizedDifference(['B8', 'B4']).rename('NDVI')
-    ndwi = image.normalizedDifference(['B8', 'B11']).rename('NDWI')
-    gndvi = image.normalizedDifference(['B8', 'B3']).rename('GNDVI')
-    return image.addBands([ndvi, ndwi, gndvi])
+# 指数はGEE側では計算せず、取得した生バンドからNumPyで計算する
+RAW_BANDS = ['B3', 'B4', 'B8', 'B11']
+
+def normalized_difference(a, b):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (a - b) / (a + b)
 
 s2_collection = (ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED')
     .filterBounds(target_polygons.geometry())
     .filterDate(args.last_date if not args.force_rebuild else START_DATE, END_DATE)
     .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', CLOUD_THRESHOLD))
     .map(mask_s2_clouds)
-    .map(add_indices)
+    .select(RAW_BANDS)
 )
 
-image_count = s2_collection.size().getInfo()
-print(f"  ✓ 検索画像数: {image_count}枚")
+# 件数は[4]のgetInfo()で分かるので、ここでは1枚でもあるかだけ確認する
+has_images = s2_collection.limit(1).size().getInfo() > 0
 
-if image_count == 0 and not args.force_rebuild:
+if not has_images and not args.force_rebuild:
     print("\n⚠️ 新規画像なし。処理をスキップします。")
     exit(0)
 
@@ -99,8 +107,8 @@ print("\n[3] 履歴データ読み込み中...")
 
 history_file = os.path.join(OUTPUT_DIR, 'observation_history.json')
 if os.path.exists(history_file):
-    with open(history_file, 'r', encoding='utf-8') as f:
-        history = json.load(f)
+    with open(history_file, 'rb') as f:
+        history = orjson.loads(f.read())
     print(f"  ✓ 既存観測日数: {len(history['dates'])}日")
 else:
     history = {
@@ -114,6 +122,7 @@ else:
 print("\n[4] 観測日取得中...")
 
 collection_info = s2_collection.getInfo()
+print(f"  ✓ 検索画像数: {len(collection_info.get('features', []))}枚")
 all_dates_from_gee = {}
 
 for feature in collection_info.get('features', []):
@@ -130,7 +139,7 @@ new_dates = []
 existing_dates = []
 
 for date_str, idx in sorted(all_dates_from_gee.items()):
-    cache_file = os.path.join(CACHE_DIR, f'{date_str}.json')
+    cache_file = os.path.join(CACHE_DIR, f'{date_str}.parquet')
     
     if args.force_rebuild or not os.path.exists(cache_file):
         new_dates.append(date_str)
@@ -149,129 +158,179 @@ if len(new_dates) == 0 and not args.force_rebuild:
 
 # ===== マップ中心座標 =====
 print("\n[5] 筆ポリゴン情報取得中...")
-fields_info = target_polygons.getInfo()
-coords = target_polygons.geometry().bounds().getInfo()['coordinates'][0]
-center_lon = sum([c[0] for c in coords]) / len(coords)
-center_lat = sum([c[1] for c in coords]) / len(coords)
+
+# 筆の形状・住所は日付に依存しないため、日付キャッシュとは別に1ファイルで保持し、
+# 筆リスト(Excel)とアセットが変わっていなければGEEから再取得しない
+with open(TARGET_FIELDS_PATH, 'rb') as f:
+    fields_key = hashlib.sha256(f.read() + FIELD_ASSET.encode('utf-8')).hexdigest()[:16]
+
+fields_info = None
+if os.path.exists(FIELDS_FILE) and not args.force_rebuild:
+    with open(FIELDS_FILE, 'rb') as f:
+        cached_fields = orjson.loads(f.read())
+    if cached_fields.get('asset') == FIELD_ASSET and cached_fields.get('source_hash') == fields_key:
+        fields_info = cached_fields
+        print(f"  ✓ キャッシュ利用: {len(fields_info['features'])}筆")
+
+if fields_info is None:
+    fetched_fields = target_polygons.getInfo()
+    fields_info = {
+        'type': 'FeatureCollection',
+        'asset': FIELD_ASSET,
+        'source_hash': fields_key,
+        'features': [
+            {
+                'type': 'Feature',
+                'geometry': feature['geometry'],
+                'properties': {
+                    'polygon_uu': feature['properties'].get('polygon_uu'),
+                    'address': uu_to_addr.get(feature['properties'].get('polygon_uu'), '不明')
+                }
+            }
+            for feature in fetched_fields['features'] if feature['geometry']['type'] == 'Polygon'
+        ]
+    }
+    with open(FIELDS_FILE, 'wb') as f:
+        f.write(orjson.dumps(fields_info))
+    print(f"  ✓ GEEから取得: {len(fields_info['features'])}筆")
+
+all_coords = np.array([
+    c for f in fields_info['features'] for ring in f['geometry']['coordinates'] for c in ring
+], dtype=np.float64)
+center_lon, center_lat = (all_coords.min(axis=0) + all_coords.max(axis=0)) / 2
 print(f"  ✓ マップ中心: ({center_lat:.4f}, {center_lon:.4f})")
 
-# ===== カラーマップ関数 =====
-def get_ndvi_color(ndvi):
-    if ndvi is None or np.isnan(ndvi):
-        return '#808080'
-    if ndvi < 0.2:
-        return '#d73027'
-    if ndvi < 0.4:
-        return '#fc8d59'
-    if ndvi < 0.6:
-        return '#fee08b'
-    if ndvi < 0.8:
-        return '#91cf60'
-    return '#1a9850'
-
-def get_ndwi_color(ndwi):
-    if ndwi is None or np.isnan(ndwi):
-        return '#808080'
-    if ndwi < -0.3:
-        return '#8B4513'
-    if ndwi < -0.1:
-        return '#D2691E'
-    if ndwi < 0.1:
-        return '#F4A460'
-    if ndwi < 0.3:
-        return '#87CEEB'
-    return '#4169E1'
-
-def get_gndvi_color(gndvi):
-    if gndvi is None or np.isnan(gndvi):
-        return '#808080'
-    if gndvi < 0.2:
-        return '#FFFF00'
-    if gndvi < 0.4:
-        return '#9ACD32'
-    if gndvi < 0.6:
-        return '#32CD32'
-    if gndvi < 0.8:
-        return '#228B22'
-    return '#006400'
+# ===== カラーマップ =====
+# 区切り値(BINS)と色(LUT)でNumPyの一括変換を行う。凡例の色と対応
+def hex_to_rgba(color):
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5)) + (255,)
+
+NAN_RGBA = hex_to_rgba('#808080')
+
+NDVI_BINS = np.array([0.2, 0.4, 0.6, 0.8])
+NDVI_LUT = np.array([hex_to_rgba(c) for c in ('#d73027', '#fc8d59', '#fee08b', '#91cf60', '#1a9850')], dtype=np.uint8)
+
+NDWI_BINS = np.array([-0.3, -0.1, 0.1, 0.3])
+NDWI_LUT = np.array([hex_to_rgba(c) for c in ('#8B4513', '#D2691E', '#F4A460', '#87CEEB', '#4169E1')], dtype=np.uint8)
+
+GNDVI_BINS = np.array([0.2, 0.4, 0.6, 0.8])
+GNDVI_LUT = np.array([hex_to_rgba(c) for c in ('#FFFF00', '#9ACD32', '#32CD32', '#228B22', '#006400')], dtype=np.uint8)
+
+def colorize(values, bins, lut):
+    values = np.asarray(values, dtype=np.float32)
+    # NaN は digitize で末尾の区分になるが、直後に灰色で上書きする
+    rgba = lut[np.digitize(values, bins)]
+    rgba[np.isnan(values)] = NAN_RGBA
+    return rgba
 
 # ===== 新規日付の処理とキャッシュ生成 =====
 print("\n[6] 新規日付処理中...")
 
+# 筆ごとの番号（Excelの行順）を焼き込んだ画像。筆外は -1
+field_ids = target_polygons.map(
+    lambda f: f.set('fid', ee.List(target_polygon_ids).indexOf(f.get('polygon_uu')))
+)
+fid_image = ee.Image.constant(-1).toInt32().paint(field_ids, 'fid').rename('fid')
+
+def fetch_pixels(dates):
+    """指定日付の生バンドを1枚のマルチバンド画像にまとめ、バイナリ(NumPy配列)で取得"""
+    # system:index からアセットを直接参照する（コレクションの再フィルタを避ける）
+    # 雲マスク部分は -1 で埋めて返す
+    date_bands = [
+        mask_s2_clouds(ee.Image(f"COPERNICUS/S2_SR_HARMONIZED/{history['date_to_index'][date]}"))
+            .select(RAW_BANDS, [f'{date}_{band}' for band in RAW_BANDS])
+            .unmask(-1)
+        for date in dates
+    ]
+    stack = ee.Image.cat(date_bands + [ee.Image.pixelLonLat(), fid_image])
+    
+    return ee.data.computePixels({
+        'expression': stack,
+        'fileFormat': 'NUMPY_NDARRAY',
+        'grid': pixel_grid
+    })
+
+pixel_arrays = {}
+if new_dates:
+    try:
+        s2_proj = s2_collection.first().select('B8').projection()
+        grid_info = ee.Dictionary({
+            'crs': s2_proj.crs(),
+            'coords': target_polygons.geometry().bounds(1, s2_proj).coordinates().get(0)
+        }).getInfo()
+    except Exception as e:
+        print(f"  グリッド取得エラー: {e}")
+        exit(1)
+    
+    # Sentinel-2のネイティブ格子(UTM)に合わせた取得範囲
+    xs, ys = zip(*grid_info['coords'])
+    x0 = np.floor(min(xs) / PIXEL_SCALE) * PIXEL_SCALE
+    y0 = np.ceil(max(ys) / PIXEL_SCALE) * PIXEL_SCALE
+    pixel_grid = {
+        'crsCode': grid_info['crs'],
+        'affineTransform': {
+            'scaleX': PIXEL_SCALE, 'shearX': 0, 'translateX': float(x0),
+            'shearY': 0, 'scaleY': -PIXEL_SCALE, 'translateY': float(y0)
+        },
+        'dimensions': {
+            'width': int(np.ceil((max(xs) - x0) / PIXEL_SCALE)),
+            'height': int(np.ceil((y0 - min(ys)) / PIXEL_SCALE))
+        }
+    }
+    
+    # 日付をまとまりごとに分け、並列に取得（通信待ちを重ねる）
+    date_chunks = [new_dates[i:i + DATES_PER_REQUEST] for i in range(0, len(new_dates), DATES_PER_REQUEST)]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(fetch_pixels, chunk): chunk for chunk in date_chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                chunk_array = future.result()
+            except ee.EEException as e:
+                print(f"  ⚠️ ピクセル取得エラー ({chunk[0]}〜{chunk[-1]}): {e}")
+                continue
+            for date in chunk:
+                pixel_arrays[date] = chunk_array
+    
+    print(f"  ✓ 取得グリッド: {pixel_grid['dimensions']['width']}×{pixel_grid['dimensions']['height']}px × {len(pixel_arrays)}日")
+
 for date_idx, date in enumerate(new_dates):
     print(f"\n  === [{date_idx+1}/{len(new_dates)}] {date} 処理中 ===")
     
-    target_index = history['date_to_index'][date]
-    target_image = s2_collection.filter(ee.Filter.eq('system:index', target_index)).first()
+    if date not in pixel_arrays:
+        print("  ⚠️ データ取得失敗のためスキップ")
+        continue
+    pixel_array = pixel_arrays[date]
     
-    # 日付ごとのGeoJSONデータ
-    date_cache = {
-        'date': date,
-        'fields': []
-    }
+    # 筆内かつ雲マスク外（-1以外）のピクセルだけをfloat32で取り出して指数計算
+    # 欠損は NaN のみ（反射率が全て0のピクセルは 0/0 で NaN になる）
+    fid = pixel_array['fid']
+    valid = (fid >= 0) & np.all([pixel_array[f'{date}_{band}'] >= 0 for band in RAW_BANDS], axis=0)
+    b3, b4, b8, b11 = (pixel_array[f'{date}_{band}'][valid].astype(np.float32) for band in RAW_BANDS)
     
-    date_pixels = 0
+    # 筆内ピクセルを列指向の表にまとめる
+    date_df = pd.DataFrame({
+        'polygon_uu': np.asarray(target_polygon_ids, dtype=object)[fid[valid]],
+        'lat': pixel_array['latitude'][valid],
+        'lon': pixel_array['longitude'][valid],
+        'ndvi': normalized_difference(b8, b4),
+        'ndwi': normalized_difference(b8, b11),
+        'gndvi': normalized_difference(b8, b3)
+    })
     
+    pixel_counts = date_df['polygon_uu'].value_counts()
     for field_idx, feature in enumerate(fields_info['features']):
         if feature['geometry']['type'] != 'Polygon':
             continue
         
         polygon_uu = feature['properties'].get('polygon_uu')
-        address = target_fields_df[target_fields_df['polygon_uu'] == polygon_uu]['address'].values
-        address = address[0] if len(address) > 0 else '不明'
-        
-        print(f"    [{field_idx+1}/{len(fields_info['features'])}] {address}...", end='', flush=True)
-        
-        field_geom = ee.Geometry.Polygon(feature['geometry']['coordinates'])
-        
-        try:
-            sample_data = target_image.select(['NDVI', 'NDWI', 'GNDVI']).sample(
-                region=field_geom,
-                scale=PIXEL_SCALE,
-                geometries=True
-            ).getInfo()
-            
-            if 'features' not in sample_data:
-                print(" データなし")
-                continue
-            
-            pixel_count = len(sample_data['features'])
-            
-            # 圃場データをキャッシュに保存
-            field_data = {
-                'polygon_uu': polygon_uu,
-                'address': address,
-                'boundary': feature['geometry']['coordinates'][0],
-                'pixels': []
-            }
-            
-            for pixel_feature in sample_data['features']:
-                geom = pixel_feature.get('geometry', {})
-                props = pixel_feature.get('properties', {})
-                if not geom or not props:
-                    continue
-                
-                lon, lat = geom['coordinates']
-                field_data['pixels'].append({
-                    'lat': lat,
-                    'lon': lon,
-                    'ndvi': props.get('NDVI'),
-                    'ndwi': props.get('NDWI'),
-                    'gndvi': props.get('GNDVI')
-                })
-            
-            date_cache['fields'].append(field_data)
-            date_pixels += pixel_count
-            print(f" {pixel_count}px")
-            
-        except Exception as e:
-            print(f" エラー: {e}")
-            continue
+        address = uu_to_addr.get(polygon_uu, '不明')
+        print(f"    [{field_idx+1}/{len(fields_info['features'])}] {address}... {pixel_counts.get(polygon_uu, 0)}px")
     
     # キャッシュファイル保存
-    cache_file = os.path.join(CACHE_DIR, f'{date}.json')
-    with open(cache_file, 'w', encoding='utf-8') as f:
-        json.dump(date_cache, f, ensure_ascii=False, indent=2)
+    cache_file = os.path.join(CACHE_DIR, f'{date}.parquet')
+    date_df.to_parquet(cache_file, compression='zstd', index=False)
+    date_pixels = len(date_df)
     
     if date not in history['dates']:
         history['dates'].append(date)
@@ -286,11 +345,66 @@ m_ndvi = folium.Map(location=[center_lat, center_lon], zoom_start=15, tiles='Ope
 m_ndwi = folium.Map(location=[center_lat, center_lon], zoom_start=15, tiles='OpenStreetMap')
 m_gndvi = folium.Map(location=[center_lat, center_lon], zoom_start=15, tiles='OpenStreetMap')
 
+# ピクセル画像は筆境界（overlayPane, z-index 400）より下に描画する
+folium.map.CustomPane('pixels', z_index=350).add_to(m_ndvi)
+folium.map.CustomPane('pixels', z_index=350).add_to(m_ndwi)
+folium.map.CustomPane('pixels', z_index=350).add_to(m_gndvi)
+
+# 筆境界（日付に依存しないため各マップに1回だけ描画し、常時表示）
+# 筆ごとのPolygonではなく、1つのGeoJSONレイヤーとしてまとめて埋め込む
+fields_fc = {'type': 'FeatureCollection', 'features': fields_info['features']}
+
+def boundary_layer():
+    return folium.GeoJson(
+        fields_fc,
+        name='筆境界',
+        style_function=lambda feature: {'color': '#000000', 'weight': 2, 'fill': False},
+        tooltip=folium.GeoJsonTooltip(fields=['address'], labels=False)
+    )
+
+boundary_layer().add_to(m_ndvi)
+boundary_layer().add_to(m_ndwi)
+boundary_layer().add_to(m_gndvi)
+
 all_dates = sorted(history['dates'])
 total_pixels = 0
 
+RASTER_UPSAMPLE = 4  # 1ピクセルを何×何セルで描くか（UTM格子の傾きによる隙間対策）
+HALF_DEG_LAT = PIXEL_SCALE / 2 / 111320.0  # ピクセル半幅（緯度方向の度）
+
+def pixel_bounds(lats, lons):
+    """ピクセル中心の緯度経度から [南, 西, 北, 東] の配列を作る（経度方向は cos(緯度) で補正）"""
+    half_lon = HALF_DEG_LAT / np.cos(np.deg2rad(lats))
+    return np.stack([lats - HALF_DEG_LAT, lons - half_lon, lats + HALF_DEG_LAT, lons + half_lon], axis=1)
+
+def raster_layout(bounds):
+    """ピクセル範囲から、ラスタ上の描画先セル番号・画像サイズ・表示範囲を求める（3指数で共用）"""
+    south, west, north, east = bounds.T
+    lat_min, lat_max = south.min(), north.max()
+    lon_min, lon_max = west.min(), east.max()
+    cell_lat = 2 * HALF_DEG_LAT / RASTER_UPSAMPLE
+    cell_lon = (east - west).mean() / RASTER_UPSAMPLE
+    
+    height = int(np.ceil((lat_max - lat_min) / cell_lat))
+    width = int(np.ceil((lon_max - lon_min) / cell_lon))
+    rows = np.clip(np.round((lat_max - north) / cell_lat).astype(int), 0, height - RASTER_UPSAMPLE)
+    cols = np.clip(np.round((west - lon_min) / cell_lon).astype(int), 0, width - RASTER_UPSAMPLE)
+    
+    # 各ピクセルが塗る RASTER_UPSAMPLE×RASTER_UPSAMPLE セルの通し番号
+    offsets = np.arange(RASTER_UPSAMPLE)
+    cells = ((rows[:, None, None] + offsets[None, :, None]) * width
+             + cols[:, None, None] + offsets[None, None, :]).reshape(len(rows), -1)
+    return cells, (height, width), [[lat_min, lon_min], [lat_max, lon_max]]
+
+def paint_raster(layout, rgba):
+    """raster_layout の配置にピクセル色を塗ったRGBA配列を作る"""
+    cells, (height, width), _ = layout
+    grid = np.zeros((height, width, 4), dtype=np.uint8)
+    grid.reshape(-1, 4)[cells] = rgba[:, None, :]
+    return grid
+
 for date_idx, date in enumerate(all_dates):
-    cache_file = os.path.join(CACHE_DIR, f'{date}.json')
+    cache_file = os.path.join(CACHE_DIR, f'{date}.parquet')
     
     if not os.path.exists(cache_file):
         print(f"  ⚠️ キャッシュなし: {date}")
@@ -298,8 +412,7 @@ for date_idx, date in enumerate(all_dates):
     
     print(f"  [{date_idx+1}/{len(all_dates)}] {date} 読み込み中...", end='', flush=True)
     
-    with open(cache_file, 'r', encoding='utf-8') as f:
-        date_cache = json.load(f)
+    date_df = pd.read_parquet(cache_file)
     
     # レイヤー作成（最新日付のみ表示）
     show_layer = (date == all_dates[-1])
@@ -307,68 +420,17 @@ for date_idx, date in enumerate(all_dates):
     layer_ndwi = FeatureGroup(name=f'NDWI_{date}', show=show_layer)
     layer_gndvi = FeatureGroup(name=f'GNDVI_{date}', show=show_layer)
     
-    date_pixel_count = 0
+    # 日付内の全ピクセルを1枚のPNGにしてImageOverlayで重ねる
+    date_pixel_count = len(date_df)
     
-    for field_data in date_cache['fields']:
-        address = field_data['address']
-        
-        # ピクセル描画
-        for pixel in field_data['pixels']:
-            lat = pixel['lat']
-            lon = pixel['lon']
-            ndvi = pixel['ndvi']
-            ndwi = pixel['ndwi']
-            gndvi = pixel['gndvi']
-            
-            half_size = PIXEL_SCALE / 2 / 111320
-            bounds = [[lat - half_size, lon - half_size], [lat + half_size, lon + half_size]]
-            
-            # NDVI
-            ndvi_str = f"{ndvi:.3f}" if ndvi is not None and not np.isnan(ndvi) else 'N/A'
-            folium.Rectangle(
-                bounds=bounds,
-                color=get_ndvi_color(ndvi),
-                fill=True,
-                fillColor=get_ndvi_color(ndvi),
-                fillOpacity=0.8,
-                weight=0.5,
-                popup=f"<b>{address}</b><br>日付: {date}<br>NDVI: {ndvi_str}",
-                tooltip=f"{date}: NDVI {ndvi_str}"
-            ).add_to(layer_ndvi)
-            
-            # NDWI
-            ndwi_str = f"{ndwi:.3f}" if ndwi is not None and not np.isnan(ndwi) else 'N/A'
-            folium.Rectangle(
-                bounds=bounds,
-                color=get_ndwi_color(ndwi),
-                fill=True,
-                fillColor=get_ndwi_color(ndwi),
-                fillOpacity=0.8,
-                weight=0.5,
-                popup=f"<b>{address}</b><br>日付: {date}<br>NDWI: {ndwi_str}",
-                tooltip=f"{date}: NDWI {ndwi_str}"
-            ).add_to(layer_ndwi)
-            
-            # GNDVI
-            gndvi_str = f"{gndvi:.3f}" if gndvi is not None and not np.isnan(gndvi) else 'N/A'
-            folium.Rectangle(
-                bounds=bounds,
-                color=get_gndvi_color(gndvi),
-                fill=True,
-                fillColor=get_gndvi_color(gndvi),
-                fillOpacity=0.8,
-                weight=0.5,
-                popup=f"<b>{address}</b><br>日付: {date}<br>GNDVI: {gndvi_str}",
-                tooltip=f"{date}: GNDVI {gndvi_str}"
-            ).add_to(layer_gndvi)
-            
-            date_pixel_count += 1
+    if date_pixel_count > 0:
+        layout = raster_layout(pixel_bounds(date_df['lat'].to_numpy(), date_df['lon'].to_numpy()))
         
-        # 筆境界線
-        coords_poly = [[lat, lon] for lon, lat in field_data['boundary']]
-        folium.Polygon(coords_poly, color='#000000', weight=2, fill=False).add_to(layer_ndvi)
-        folium.Polygon(coords_poly, color='#000000', weight=2, fill=False).add_to(layer_ndwi)
-        folium.Polygon(coords_poly, color='#000000', weight=2, fill=False).add_to(layer_gndvi)
+        for key, bins, lut, layer in (('ndvi', NDVI_BINS, NDVI_LUT, layer_ndvi),
+                                      ('ndwi', NDWI_BINS, NDWI_LUT, layer_ndwi),
+                                      ('gndvi', GNDVI_BINS, GNDVI_LUT, layer_gndvi)):
+            rgba = colorize(date_df[key].to_numpy(), bins, lut)
+            folium.raster_layers.ImageOverlay(paint_raster(layout, rgba), bounds=layout[2], opacity=0.8, pane='pixels').add_to(layer)
     
     layer_ndvi.add_to(m_ndvi)
     layer_ndwi.add_to(m_ndwi)
@@ -654,17 +716,22 @@ m_gndvi.get_root().html.add_child(folium.Element(legend_gndvi))
 # ===== 保存 =====
 print("\n[8] マップ保存中...")
 
-m_ndvi.save(os.path.join(OUTPUT_DIR, 'index.html'))
-m_ndwi.save(os.path.join(OUTPUT_DIR, 'ndwi.html'))
-m_gndvi.save(os.path.join(OUTPUT_DIR, 'gndvi.html'))
+def save_map(m, filename):
+    """マップを1回だけレンダリングして書き出し、サイズ（転送時のgzip相当も）を返す"""
+    html = m.get_root().render().encode('utf-8')
+    with open(os.path.join(OUTPUT_DIR, filename), 'wb') as f:
+        f.write(html)
+    return len(html), len(gzip.compress(html, compresslevel=6))
 
-print(f"  ✓ NDVIマップ: index.html")
-print(f"  ✓ NDWIマップ: ndwi.html")
-print(f"  ✓ GNDVIマップ: gndvi.html")
+for label, m, filename in (('NDVI', m_ndvi, 'index.html'),
+                           ('NDWI', m_ndwi, 'ndwi.html'),
+                           ('GNDVI', m_gndvi, 'gndvi.html')):
+    raw_size, gz_size = save_map(m, filename)
+    print(f"  ✓ {label}マップ: {filename} ({raw_size/1024:.0f} KB, gzip {gz_size/1024:.0f} KB)")
 
 # ===== 履歴保存 =====
-with open(history_file, 'w', encoding='utf-8') as f:
-    json.dump(history, f, ensure_ascii=False, indent=2)
+with open(history_file, 'wb') as f:
+    f.write(orjson.dumps(history, option=orjson.OPT_INDENT_2))
 
 if new_dates:
     with open(STATE_FILE, 'w') as f: